@@ -2,9 +2,115 @@ import sys
 from ids_peak import ids_peak_ipl_extension as ipl
 from ids_peak import ids_peak as peak
 import threading
+import queue
+import time
+import collections
+import ctypes
 import cv2
+import numpy as np
 import json
+import logging
 import os
+import pathlib
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# The IDS Peak library is shared by every CameraManager of the process: it is initialized by the first
+# camera started, closed by the last one stopped, and devices are enumerated again only when a camera
+# cannot be found in the current list.
+_peak_lock = threading.Lock()
+_peak_refcount = 0
+_peak_devices_updated = False
+
+def _acquire_peak():
+    """
+    Initializes the IDS Peak library if no other camera is using it.
+    """
+    global _peak_refcount
+    with _peak_lock:
+        if _peak_refcount == 0:
+            peak.Library.Initialize()
+        _peak_refcount += 1
+
+def _release_peak():
+    """
+    Closes the IDS Peak library once no camera is using it anymore.
+    """
+    global _peak_refcount, _peak_devices_updated
+    with _peak_lock:
+        _peak_refcount -= 1
+        if _peak_refcount == 0:
+            peak.Library.Close()
+            _peak_devices_updated = False
+
+def _device_manager(refresh=False):
+    """
+    Returns the IDS Peak device manager, enumerating the devices only the first time.
+
+    :param refresh: If True, the devices are enumerated again, e.g. to find a camera plugged in since.
+    :return: The device manager.
+    """
+    global _peak_devices_updated
+    with _peak_lock:
+        device_manager = peak.DeviceManager.Instance()
+        if refresh or not _peak_devices_updated:
+            device_manager.Update()
+            _peak_devices_updated = True
+    return device_manager
+
+# Lines typed on stdin, read by a single thread shared by every CameraManager. The thread only reads
+# a line when a prompt asks for one, so stdin is left alone for the host program between prompts.
+_stdin_thread = None
+_stdin_wanted = threading.Event()
+
+def _stdin_pump():
+    """
+    Forwards one line read from stdin to CameraManager.commands each time _stdin_wanted is set.
+    End of file is forwarded as None, after which the thread exits.
+    """
+    while True:
+        _stdin_wanted.wait()
+        _stdin_wanted.clear()
+        line = sys.stdin.readline()
+        CameraManager.commands.put(line if line else None)
+        if not line:
+            return
+
+def _request_stdin_line():
+    """
+    Asks the stdin thread for one more line, starting the thread the first time.
+    """
+    global _stdin_thread
+    if _stdin_thread is None:
+        _stdin_thread = threading.Thread(target=_stdin_pump, daemon=True)
+        _stdin_thread.start()
+    _stdin_wanted.set()
+
+# PFNC code of Mono8, the only pixel format runtime_frame can publish without copying.
+PIXEL_FORMAT_MONO8 = 0x01080001
+
+IMAGE_FORMATS = ("bgr", "gray")
+
+# Consecutive acquisition errors after which runtime_frame gives up, e.g. once the device is lost.
+MAX_ACQUISITION_ERRORS = 10
+
+def _check_image_format(image_format):
+    """
+    Checks the image format requested from get_image or wait4frame.
+
+    :param image_format: The requested format.
+    :raises ValueError: If the format is not one of IMAGE_FORMATS.
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unknown image format {image_format!r}, expected one of {IMAGE_FORMATS}")
+
+NODE_NAMES = ("OffsetX", "OffsetY", "Width", "Height", "AcquisitionFrameRate", "ExposureTime", "ExposureAuto",
+              "GainAuto", "Gain", "PayloadSize", "TLParamsLocked", "AcquisitionStart", "AcquisitionStop")
 
 class CameraManager:
     """
@@ -12,23 +118,59 @@ class CameraManager:
     It provides various methods to configure and control the camera.
     """
 
-    def __init__(self, camera_id=None):
+    # Fixed attribute layout: no per-instance __dict__, and attribute reads in the acquisition loop are slot lookups.
+    __slots__ = ("Msetting", "_peak_acquired", "m_device", "m_dataStream", "m_node_map_remote_device", "_nodes", "_limits",
+                 "_exposure_auto", "image", "frame_count", "acquisition_thread", "cpu_core", "running", "_stop_event", "_frame_lock",
+                 "_new_frame", "_held_buffers", "_buffer_views", "held_buffer_count", "buffer_count", "max_frame_age",
+                 "clock_window", "_clock_offsets", "ID", "_preview_enabled", "_preview_shown",
+                 "preview_fps", "_preview_count", "_preview_time", "folder_path", "sync_barrier", "sync_timeout")
+
+    # Answers to the manual_settings prompts. Lines typed by the user end up here, and scripts can put
+    # their own answers to drive a session without a keyboard.
+    commands = queue.Queue()
+
+    def __init__(self, camera_id=None, cpu_core=None):
         """
         Initializes the CameraManager class.
 
         :param camera_id: Serial number of the camera to be managed. If None, the first available camera will be used.
+        :param cpu_core: CPU core the acquisition thread is pinned to, with a raised priority. If None, the
+                         thread is neither pinned nor boosted. With several cameras, give each one a different core.
         """
         self.Msetting = False
+        self._peak_acquired = False
         self.m_device = None
         self.m_dataStream = None
         self.m_node_map_remote_device = None
+        self._nodes = {}
+        self._limits = {}
+        self._exposure_auto = True
         self.image = None
+        self.frame_count = 0
         self.acquisition_thread = None
+        self.cpu_core = cpu_core
         self.running = False
-        self.bgr = None
+        self._stop_event = threading.Event()
+        self._frame_lock = threading.Lock()
+        self._new_frame = threading.Condition(self._frame_lock)
+        self._held_buffers = collections.deque()
+        self._buffer_views = {}
+        self.held_buffer_count = 3
+        self.buffer_count = 16
+        self.max_frame_age = None
+        self.clock_window = 10
+        self._clock_offsets = collections.deque()
         self.ID = camera_id
-        self.print = False
+        self._preview_enabled = False
+        self._preview_shown = False
+        self.preview_fps = 10
+        self._preview_count = 0
+        self._preview_time = 0.0
         self.folder_path = "camera_settings"
+        # Optional threading.Barrier shared by several cameras started from their own threads: each
+        # start_acquisition waits on it right before AcquisitionStart, so the cameras start streaming together.
+        self.sync_barrier = None
+        self.sync_timeout = 10
 
     def open_camera(self):
         """
@@ -37,22 +179,20 @@ class CameraManager:
         :return: True if the camera is successfully opened, False otherwise.
         """
         try:
-            device_manager = peak.DeviceManager.Instance()
-            device_manager.Update()
-            if device_manager.Devices().empty():
-                return False
-
-            device_count = device_manager.Devices().size()
-            for i in range(device_count):
-                if device_manager.Devices()[i].SerialNumber() == self.ID or self.ID is None:
-                    if device_manager.Devices()[i].IsOpenable():
-                        self.m_device = device_manager.Devices()[i].OpenDevice(peak.DeviceAccessType_Control)
-                        self.m_node_map_remote_device = self.m_device.RemoteDevice().NodeMaps()[0]
-                        print("Device opened: " + self.m_device.SerialNumber())
-                        self.ID = self.m_device.SerialNumber()
-                        return True
+            # The cached device list may predate the camera, so it is enumerated again before giving up.
+            for refresh in (False, True):
+                for device in _device_manager(refresh).Devices():
+                    if self.ID is None or device.SerialNumber() == self.ID:
+                        if device.IsOpenable():
+                            self.m_device = device.OpenDevice(peak.DeviceAccessType_Control)
+                            self.m_node_map_remote_device = self.m_device.RemoteDevice().NodeMaps()[0]
+                            self._nodes = {name: self.m_node_map_remote_device.FindNode(name) for name in NODE_NAMES}
+                            self.ID = self.m_device.SerialNumber()
+                            logger.info("Device opened: %s", self.ID)
+                            return True
+            return False
         except Exception as e:
-            print(f"Error opening camera: {str(e)}")
+            logger.error("Error opening camera: %s", e)
             return False
 
     def prepare_acquisition(self):
@@ -69,9 +209,117 @@ class CameraManager:
             self.m_dataStream = data_streams[0].OpenDataStream()
             return True
         except Exception as e:
-            print(f"Error preparing acquisition: {str(e)}")
+            logger.error("Error preparing acquisition: %s", e)
             return False
 
+    def _get_limits(self, name):
+        """
+        Returns the minimum and maximum of a node. The limits are cached until the next write to the
+        camera, since changing one node can move the limits of another. While the exposure is automatic
+        the camera changes ExposureTime by itself, so the frame rate and exposure limits are read every time.
+
+        :param name: The name of the node.
+        :return: Tuple (minimum, maximum).
+        """
+        if self._exposure_auto and name in ("AcquisitionFrameRate", "ExposureTime"):
+            return (self._nodes[name].Minimum(), self._nodes[name].Maximum())
+        if name not in self._limits:
+            self._limits[name] = (self._nodes[name].Minimum(), self._nodes[name].Maximum())
+        return self._limits[name]
+
+    def _set_value(self, name, value):
+        """
+        Writes the value of a node and invalidates the cached limits.
+
+        :param name: The name of the node.
+        :param value: The value to write.
+        """
+        self._limits.clear()
+        self._nodes[name].SetValue(value)
+
+    def _set_entry(self, name, entry):
+        """
+        Selects the entry of an enumeration node and invalidates the cached limits.
+
+        :param name: The name of the node.
+        :param entry: The entry to select.
+        """
+        self._limits.clear()
+        self._nodes[name].SetCurrentEntry(entry)
+        if name == "ExposureAuto":
+            self._exposure_auto = entry != "Off"
+
+    def _apply_settings(self, values):
+        """
+        Writes several node values in one pass, ordered so that no intermediate write violates the
+        constraints between nodes: the offsets are cleared before the size is set, and the frame rate
+        is lowered before the exposure time is set. A full ROI that matches the current one is skipped,
+        since rewriting it reconfigures the sensor for nothing.
+
+        :param values: Dictionary mapping node names (OffsetX, OffsetY, Width, Height, AcquisitionFrameRate,
+                       Gain, ExposureTime) to the values to write.
+        :return: True if all the values are successfully written, False otherwise.
+        """
+        try:
+            roi = ("Width", "Height", "OffsetX", "OffsetY")
+            if all(name in values and self._nodes[name].Value() == values[name] for name in roi):
+                values = {name: value for name, value in values.items() if name not in roi}
+
+            for name in ("OffsetX", "OffsetY", "AcquisitionFrameRate"):
+                if name in values:
+                    self._set_value(name, self._get_limits(name)[0])
+            if "Gain" in values:
+                self._set_entry("GainAuto", "Off")
+            if "ExposureTime" in values:
+                self._set_entry("ExposureAuto", "Off")
+
+            for name in ("Width", "Height", "OffsetX", "OffsetY", "Gain", "ExposureTime", "AcquisitionFrameRate"):
+                if name in values:
+                    self._set_value(name, values[name])
+            return True
+        except Exception as e:
+            logger.error("Error applying settings: %s", e)
+            return False
+
+    def _apply_loaded(self, settings):
+        """
+        Validates settings loaded from a JSON file against the camera limits and applies them.
+        The frame rate and exposure time limit each other, so only their lower bounds are checked here.
+
+        :param settings: Dictionary with the same layout as the one written by save_settings.
+        :return: True if the settings are successfully applied, False otherwise.
+        :raises ValueError: If any setting is out of range, listing all the offending fields.
+        """
+        values = {
+            "OffsetX": settings["ROI"]["OffsetX"],
+            "OffsetY": settings["ROI"]["OffsetY"],
+            "Width": settings["ROI"]["Width"],
+            "Height": settings["ROI"]["Height"],
+            "AcquisitionFrameRate": settings["FPS"],
+            "Gain": settings["Gain"],
+            "ExposureTime": 1e3*settings["Exposure"]
+        }
+
+        w_min, w_max = self._get_limits("Width")
+        h_min, h_max = self._get_limits("Height")
+        sensor_width = w_max + self._nodes["OffsetX"].Value()
+        sensor_height = h_max + self._nodes["OffsetY"].Value()
+        bounds = {
+            "Width": (w_min, sensor_width),
+            "Height": (h_min, sensor_height),
+            "OffsetX": (self._get_limits("OffsetX")[0], sensor_width - values["Width"]),
+            "OffsetY": (self._get_limits("OffsetY")[0], sensor_height - values["Height"]),
+            "AcquisitionFrameRate": (self._get_limits("AcquisitionFrameRate")[0], float("inf")),
+            "Gain": self._get_limits("Gain"),
+            "ExposureTime": (self._get_limits("ExposureTime")[0], float("inf"))
+        }
+
+        invalid = [f"{name}={values[name]}" for name, (low, high) in bounds.items() if not low <= values[name] <= high]
+        if invalid:
+            raise ValueError(", ".join(invalid))
+
+        return self._apply_settings(values)
+
     def set_roi(self, x=0, y=0, width=None, height=None):
         """
         Sets the Region of Interest (ROI) for the camera.
@@ -83,20 +331,20 @@ class CameraManager:
         :return: True if the ROI is successfully set, False otherwise.
         """
         try:
-            x_min = self.m_node_map_remote_device.FindNode("OffsetX").Minimum()
-            y_min = self.m_node_map_remote_device.FindNode("OffsetY").Minimum()
-            w_min = self.m_node_map_remote_device.FindNode("Width").Minimum()
-            h_min = self.m_node_map_remote_device.FindNode("Height").Minimum()
+            x_min = self._get_limits("OffsetX")[0]
+            y_min = self._get_limits("OffsetY")[0]
+            w_min = self._get_limits("Width")[0]
+            h_min = self._get_limits("Height")[0]
 
-            self.m_node_map_remote_device.FindNode("OffsetX").SetValue(x_min)
-            self.m_node_map_remote_device.FindNode("OffsetY").SetValue(y_min)
-            self.m_node_map_remote_device.FindNode("Width").SetValue(w_min)
-            self.m_node_map_remote_device.FindNode("Height").SetValue(h_min)
+            self._set_value("OffsetX", x_min)
+            self._set_value("OffsetY", y_min)
+            self._set_value("Width", w_min)
+            self._set_value("Height", h_min)
 
-            x_max = self.m_node_map_remote_device.FindNode("OffsetX").Maximum()
-            y_max = self.m_node_map_remote_device.FindNode("OffsetY").Maximum()
-            w_max = self.m_node_map_remote_device.FindNode("Width").Maximum()
-            h_max = self.m_node_map_remote_device.FindNode("Height").Maximum()
+            x_max = self._get_limits("OffsetX")[1]
+            y_max = self._get_limits("OffsetY")[1]
+            w_max = self._get_limits("Width")[1]
+            h_max = self._get_limits("Height")[1]
 
             if width is None or height is None:
                 width = w_max
@@ -107,14 +355,12 @@ class CameraManager:
             elif (width < w_min) or (height < h_min) or ((x + width) > w_max) or ((y + height) > h_max):
                 return False
             else:
-                self.m_node_map_remote_device.FindNode("OffsetX").SetValue(x)
-                self.m_node_map_remote_device.FindNode("OffsetY").SetValue(y)
-                self.m_node_map_remote_device.FindNode("Width").SetValue(width)
-                self.m_node_map_remote_device.FindNode("Height").SetValue(height)
-                print("ROI of " + self.m_device.SerialNumber() +" set to: x=" + str(x) + ", y=" + str(y) + ", width=" + str(width) + ", height=" + str(height))
+                if not self._apply_settings({"Width": width, "Height": height, "OffsetX": x, "OffsetY": y}):
+                    return False
+                logger.debug("ROI of %s set to: x=%s, y=%s, width=%s, height=%s", self.ID, x, y, width, height)
                 return True
         except Exception as e:
-            print(f"Error setting ROI: {str(e)}")
+            logger.error("Error setting ROI: %s", e)
             return False
         
     def set_offset_x(self, x=0):
@@ -125,17 +371,16 @@ class CameraManager:
         :return: True if the offset is successfully set, False otherwise.
         """
         try:
-            x_min = self.m_node_map_remote_device.FindNode("OffsetX").Minimum()
-            x_max = self.m_node_map_remote_device.FindNode("OffsetX").Maximum()
+            x_min, x_max = self._get_limits("OffsetX")
             
             if x_min <= x <= x_max:
-                self.m_node_map_remote_device.FindNode("OffsetX").SetValue(x)
-                print(f"OffsetX of {self.m_device.SerialNumber()} set to: x={x}")
+                self._set_value("OffsetX", x)
+                logger.debug("OffsetX of %s set to: x=%s", self.ID, x)
                 return True
             else:
                 return False
         except Exception as e:
-            print(f"Error setting OffsetX: {str(e)}")
+            logger.error("Error setting OffsetX: %s", e)
             return False
 
     def set_offset_y(self, y=0):
@@ -146,17 +391,16 @@ class CameraManager:
         :return: True if the offset is successfully set, False otherwise.
         """
         try:
-            y_min = self.m_node_map_remote_device.FindNode("OffsetY").Minimum()
-            y_max = self.m_node_map_remote_device.FindNode("OffsetY").Maximum()
+            y_min, y_max = self._get_limits("OffsetY")
             
             if y_min <= y <= y_max:
-                self.m_node_map_remote_device.FindNode("OffsetY").SetValue(y)
-                print(f"OffsetY of {self.m_device.SerialNumber()} set to: y={y}")
+                self._set_value("OffsetY", y)
+                logger.debug("OffsetY of %s set to: y=%s", self.ID, y)
                 return True
             else:
                 return False
         except Exception as e:
-            print(f"Error setting OffsetY: {str(e)}")
+            logger.error("Error setting OffsetY: %s", e)
             return False
 
     def set_width(self, width=None):
@@ -167,20 +411,19 @@ class CameraManager:
         :return: True if the width is successfully set, False otherwise.
         """
         try:
-            w_min = self.m_node_map_remote_device.FindNode("Width").Minimum()
-            w_max = self.m_node_map_remote_device.FindNode("Width").Maximum()
+            w_min, w_max = self._get_limits("Width")
 
             if width is None:
                 width = w_max
             
             if w_min <= width <= w_max:
-                self.m_node_map_remote_device.FindNode("Width").SetValue(width)
-                print(f"Width of {self.m_device.SerialNumber()} set to: width={width}")
+                self._set_value("Width", width)
+                logger.debug("Width of %s set to: width=%s", self.ID, width)
                 return True
             else:
                 return False
         except Exception as e:
-            print(f"Error setting Width: {str(e)}")
+            logger.error("Error setting Width: %s", e)
             return False
 
     def set_height(self, height=None):
@@ -191,18 +434,17 @@ class CameraManager:
         :return: True if the height is successfully set, False otherwise.
         """
         try:
-            h_min = self.m_node_map_remote_device.FindNode("Height").Minimum()
-            h_max = self.m_node_map_remote_device.FindNode("Height").Maximum()
+            h_min, h_max = self._get_limits("Height")
             if height is None:
                 height = h_max
             if h_min <= height <= h_max:
-                self.m_node_map_remote_device.FindNode("Height").SetValue(height)
-                print(f"Height of {self.m_device.SerialNumber()} set to: height={height}")
+                self._set_value("Height", height)
+                logger.debug("Height of %s set to: height=%s", self.ID, height)
                 return True
             else:
                 return False
         except Exception as e:
-            print(f"Error setting Height: {str(e)}")
+            logger.error("Error setting Height: %s", e)
             return False
 
     def set_fps(self, fps=None):
@@ -213,26 +455,24 @@ class CameraManager:
         :return: True if the FPS is successfully set, False otherwise.
         """
         try:
-            max_fps = self.m_node_map_remote_device.FindNode("AcquisitionFrameRate").Maximum()
-            min_fps = self.m_node_map_remote_device.FindNode("AcquisitionFrameRate").Minimum()
+            min_fps, max_fps = self._get_limits("AcquisitionFrameRate")
 
             if fps is None:
                 fps = max_fps
 
-            if 1e6/self.m_node_map_remote_device.FindNode("ExposureTime").Value() < fps:
-                self.m_node_map_remote_device.FindNode("ExposureAuto").SetCurrentEntry("Continuous")
+            if 1e6/self._nodes["ExposureTime"].Value() < fps:
+                self._set_entry("ExposureAuto", "Continuous")
 
-            max_fps = self.m_node_map_remote_device.FindNode("AcquisitionFrameRate").Maximum()
-            min_fps = self.m_node_map_remote_device.FindNode("AcquisitionFrameRate").Minimum()
+            min_fps, max_fps = self._get_limits("AcquisitionFrameRate")
 
             if (fps > max_fps) or (fps < min_fps):
                 return False
-            self.m_node_map_remote_device.FindNode("AcquisitionFrameRate").SetValue(fps)
-            print("FPS of " + self.m_device.SerialNumber() +" set to: " + str(fps))
+            self._set_value("AcquisitionFrameRate", fps)
+            logger.debug("FPS of %s set to: %s", self.ID, fps)
             
             return True
         except Exception as e:
-            print(f"Error setting FPS: {str(e)}")
+            logger.error("Error setting FPS: %s", e)
             return False
     
     def set_Gain(self, GainMode="Continuous", Gain=None):
@@ -244,18 +484,17 @@ class CameraManager:
         :return: True if the gain is successfully set, False otherwise.
         """
         try:
-            self.m_node_map_remote_device.FindNode("GainAuto").SetCurrentEntry(GainMode)
+            self._set_entry("GainAuto", GainMode)
 
             if GainMode == "Off":
-                max_gain = self.m_node_map_remote_device.FindNode("Gain").Maximum()
-                min_gain = self.m_node_map_remote_device.FindNode("Gain").Minimum()
+                min_gain, max_gain = self._get_limits("Gain")
                 if (Gain < min_gain) or (Gain > max_gain):
                     return False
-                self.m_node_map_remote_device.FindNode("Gain").SetValue(Gain)
-                print("Gain of " + self.m_device.SerialNumber() +" set to: " + str(Gain))
+                self._set_value("Gain", Gain)
+                logger.debug("Gain of %s set to: %s", self.ID, Gain)
             return True
         except Exception as e:
-            print(f"Error setting Gain: {str(e)}")
+            logger.error("Error setting Gain: %s", e)
             return False
 
     def set_Exposure(self, ExposureMode="Continuous", ExposureTime=None):
@@ -267,21 +506,35 @@ class CameraManager:
         :return: True if the exposure time is successfully set, False otherwise.
         """
         try:
-            self.m_node_map_remote_device.FindNode("ExposureAuto").SetCurrentEntry(ExposureMode)
+            self._set_entry("ExposureAuto", ExposureMode)
 
             if ExposureMode == "Off":
-                max_exposure = self.m_node_map_remote_device.FindNode("ExposureTime").Maximum()
-                min_exposure = self.m_node_map_remote_device.FindNode("ExposureTime").Minimum()
+                min_exposure, max_exposure = self._get_limits("ExposureTime")
 
-                if ExposureTime > max_exposure and ExposureTime < min_exposure:
+                if not min_exposure <= 1e3*ExposureTime <= max_exposure:
                     return False
 
-                self.m_node_map_remote_device.FindNode("ExposureTime").SetValue(1e3*ExposureTime)
-                print("Exposure of " + self.m_device.SerialNumber() +" set to: " + str(ExposureTime))
+                self._set_value("ExposureTime", 1e3*ExposureTime)
+                logger.debug("Exposure of %s set to: %s", self.ID, ExposureTime)
             return True
         except Exception as e:
-            print(f"Error setting Exposure: {str(e)}")
+            logger.error("Error setting Exposure: %s", e)
+            return False
+
+    def set_buffer_count(self, count=16):
+        """
+        Sets how many buffers are announced to the data stream. More buffers let the camera keep
+        streaming through short stalls of the consumer (GC pauses, preview, disk writes) at the cost
+        of memory and, when the consumer falls behind, of latency. 7-10 buffers suit a single camera,
+        20-30 suit high frame rates or several cameras. Takes effect the next time the buffers are allocated.
+
+        :param count: The number of buffers to announce. The SDK minimum is used if it is larger.
+        :return: True if the count is valid, False otherwise.
+        """
+        if count < 1:
             return False
+        self.buffer_count = count
+        return True
 
     def alloc_and_announce_buffers(self):
         """
@@ -291,20 +544,28 @@ class CameraManager:
         """
         try:
             if self.m_dataStream:
+                # The published image points into the buffers revoked below.
+                with self._frame_lock:
+                    self.image = None
                 self.m_dataStream.Flush(peak.DataStreamFlushMode_DiscardAll)
                 for buffer in self.m_dataStream.AnnouncedBuffers():
                     self.m_dataStream.RevokeBuffer(buffer)
+                self._held_buffers.clear()
+                self._buffer_views.clear()
 
-                payload_size = self.m_node_map_remote_device.FindNode("PayloadSize").Value()
+                payload_size = self._nodes["PayloadSize"].Value()
                 num_buffers_min_required = self.m_dataStream.NumBuffersAnnouncedMinRequired()
 
-                for count in range(num_buffers_min_required):
+                # Extra buffers make up for the ones runtime_frame holds while their frames are published.
+                num_buffers = max(num_buffers_min_required + self.held_buffer_count, self.buffer_count)
+
+                for count in range(num_buffers):
                     buffer = self.m_dataStream.AllocAndAnnounceBuffer(payload_size)
                     self.m_dataStream.QueueBuffer(buffer)
 
                 return True
         except Exception as e:
-            print(f"Error allocating and announcing buffers: {str(e)}")
+            logger.error("Error allocating and announcing buffers: %s", e)
             return False
 
     def start_acquisition(self):
@@ -316,189 +577,308 @@ class CameraManager:
         try:
             self.m_dataStream.StartAcquisition(peak.AcquisitionStartMode_Default, peak.DataStream.INFINITE_NUMBER)
             if self.Msetting:
-                self.m_node_map_remote_device.FindNode("TLParamsLocked").SetValue(0)
+                self._set_value("TLParamsLocked", 0)
             else:
-                self.m_node_map_remote_device.FindNode("TLParamsLocked").SetValue(1)
-            self.m_node_map_remote_device.FindNode("AcquisitionStart").Execute()
+                self._set_value("TLParamsLocked", 1)
+            if self.sync_barrier is not None:
+                try:
+                    self.sync_barrier.wait(self.sync_timeout)
+                except threading.BrokenBarrierError:
+                    logger.warning("Camera %s is starting without the other cameras", self.ID)
+            self._nodes["AcquisitionStart"].Execute()
             self.running = True
-            self.acquisition_thread = threading.Thread(target=self.runtime_frame, daemon=True).start()
+            self._clock_offsets.clear()
+            self._stop_event.clear()
+            self.acquisition_thread = threading.Thread(target=self.runtime_frame, daemon=True)
+            self.acquisition_thread.start()
             return True
         except Exception as e:
-            print(f"Error starting acquisition: {str(e)}")
+            logger.error("Error starting acquisition: %s", e)
             return False
 
     def runtime_frame(self):
         """
-        Continuously acquires and processes frames from the camera.
+        Continuously acquires frames from the camera and publishes the newest one.
+        If self.max_frame_age is set, frames older than that many seconds are dropped instead of published.
+        After MAX_ACQUISITION_ERRORS consecutive errors other than timeouts, the acquisition is stopped.
         """
-        flag = False
-        while self.running:
-            buffer = self.m_dataStream.WaitForFinishedBuffer(100000)
-            if not buffer.HasImage():
-                raise Exception("Buffer does not contain an image.")
-            
-            self.image = ipl.BufferToImage(buffer).get_numpy_2D()
-            self.m_dataStream.QueueBuffer(buffer)
-            self.bgr = cv2.cvtColor(self.image, cv2.COLOR_GRAY2BGR)
-            if self.print:
-                cv2.imshow(self.ID, cv2.resize(self.bgr,(self.bgr.shape[1]//2,self.bgr.shape[0]//2)))
-                cv2.waitKey(1)
-                flag = True
-            else:
-                if flag:
-                    cv2.destroyAllWindows()
-                    flag = False
-                    
+        self._boost_thread()
+        errors = 0
+        while not self._stop_event.is_set():
+            try:
+                buffer = self.m_dataStream.WaitForFinishedBuffer(50)
+            except peak.TimeoutException:
+                continue
+            except peak.AbortedException:
+                break
+            except Exception as e:
+                errors += 1
+                logger.error("Error acquiring frame: %s", e)
+                if errors >= MAX_ACQUISITION_ERRORS:
+                    logger.error("Stopping the acquisition of %s after %s consecutive errors", self.ID, errors)
+                    self.running = False
+                    break
+                self._stop_event.wait(0.1)
+                continue
+            errors = 0
+
+            if not buffer.HasImage() or (self.max_frame_age is not None and self.frame_age(buffer) > self.max_frame_age):
+                self.m_dataStream.QueueBuffer(buffer)
+                continue
+
+            image = self._buffer_view(buffer)
+            if image is None:
+                # Other pixel formats are copied out by the IPL, so the buffer goes straight back to the camera.
+                try:
+                    image = ipl.BufferToImage(buffer).get_numpy_2D().copy()
+                except Exception as e:
+                    logger.error("Error converting frame of %s: %s", self.ID, e)
+                    continue
+                finally:
+                    self.m_dataStream.QueueBuffer(buffer)
+                with self._frame_lock:
+                    self.image = image
+                    self.frame_count += 1
+                    self._new_frame.notify_all()
+                continue
+
+            # The published image is a view over the buffer, so it is only requeued once newer frames replace it.
+            # Requeuing under the frame lock keeps a buffer from being refilled while get_image copies it.
+            with self._frame_lock:
+                self._held_buffers.append(buffer)
+                if len(self._held_buffers) > self.held_buffer_count:
+                    self.m_dataStream.QueueBuffer(self._held_buffers.popleft())
+                self.image = image
+                self.frame_count += 1
+                self._new_frame.notify_all()
+
         return
+
+    def _boost_thread(self):
+        """
+        Pins the calling thread to self.cpu_core and raises its priority, to reduce the scheduling
+        jitter that makes the acquisition miss buffers. Nothing is done unless cpu_core was given.
+        Both are Linux only and silently skipped where unsupported; raising the priority also needs
+        the CAP_SYS_NICE capability.
+        """
+        if self.cpu_core is None:
+            return
+        if hasattr(os, "sched_setaffinity"):
+            try:
+                os.sched_setaffinity(0, {self.cpu_core})
+            except OSError as e:
+                logger.warning("Could not pin the acquisition thread of %s to core %s: %s", self.ID, self.cpu_core, e)
+        if sys.platform.startswith("linux"):
+            try:
+                os.nice(-5)
+            except OSError:
+                logger.debug("Could not raise the priority of the acquisition thread of %s", self.ID)
+
+    def _buffer_view(self, buffer):
+        """
+        Returns a read-only NumPy view over the image memory of a buffer. Views are created once per
+        announced buffer and frame layout, then reused every time the buffer comes back from the camera.
+
+        :param buffer: The finished buffer.
+        :return: 2D uint8 array sharing memory with the buffer, or None if the pixel format is not Mono8
+                 and the frame has to be copied out instead.
+        """
+        key = (buffer.BasePtr(), buffer.Height(), buffer.Width(), buffer.XPadding(), buffer.PixelFormat())
+        image = self._buffer_views.get(key)
+        if image is None:
+            base, height, width, padding, pixel_format = key
+            if pixel_format != PIXEL_FORMAT_MONO8:
+                logger.debug("Pixel format %#x of %s is copied out of the buffers", pixel_format, self.ID)
+                image = False
+            else:
+                rows = np.ctypeslib.as_array(ctypes.cast(base, ctypes.POINTER(ctypes.c_uint8)), shape=(height, width + padding))
+                image = rows[:, :width]
+                image.flags.writeable = False
+            self._buffer_views[key] = image
+        return image if image is not False else None
+
+    def frame_age(self, buffer):
+        """
+        Estimates how long ago a buffer was exposed. The camera clock is mapped onto time.monotonic_ns
+        using the smallest host-minus-camera offset of the last self.clock_window seconds, i.e. the frame
+        that reached the host fastest recently. Re-estimating over a window keeps the drift between the
+        two clocks from building up into the age.
+
+        :param buffer: The finished buffer.
+        :return: The age of the frame in seconds, or 0 if the camera does not timestamp its frames.
+        """
+        timestamp = buffer.Timestamp_ns()
+        if timestamp == 0:
+            return 0.0
+
+        now = time.monotonic_ns()
+        offset = now - timestamp
+        # Monotonic deque of (arrival time, offset): the oldest entry is always the window minimum.
+        offsets = self._clock_offsets
+        while offsets and offsets[-1][1] >= offset:
+            offsets.pop()
+        offsets.append((now, offset))
+        while now - offsets[0][0] > self.clock_window * 1e9:
+            offsets.popleft()
+        return (offset - offsets[0][1]) / 1e9
+
+    def show_preview(self):
+        """
+        Refreshes the preview window while the preview is enabled, and closes it once it is disabled.
+        HighGUI is not thread-safe, so this is meant to be pumped by the thread that owns the windows
+        (normally the main thread), followed by cv2.waitKey as in any OpenCV display loop.
+
+        :return: True if the window was refreshed, False otherwise.
+        """
+        if not self._preview_enabled:
+            if self._preview_shown:
+                cv2.destroyWindow(self.ID)
+                self._preview_shown = False
+            return False
+
+        if not self._refresh_preview():
+            return False
+        self._preview_shown = True
+        return True
+
+    def _refresh_preview(self):
+        """
+        Shows the newest frame in the preview window, at most self.preview_fps times per second
+        and only if a new frame arrived since the last refresh.
+
+        :return: True if the window was refreshed, False otherwise.
+        """
+        now = time.monotonic()
+        if now - self._preview_time < 1/self.preview_fps:
+            return False
+
+        # The frame is downscaled under the frame lock, so its buffer cannot be refilled meanwhile.
+        with self._frame_lock:
+            count = self.frame_count
+            if self.image is None or count == self._preview_count:
+                return False
+            preview = self.preview_frame(self.image)
+
+        cv2.imshow(self.ID, preview)
+        self._preview_count = count
+        self._preview_time = now
+        return True
+
+    def set_preview(self, enabled=True):
+        """
+        Enables or disables the preview window of the camera. The window itself is drawn and closed
+        by show_preview, on the thread that calls it.
+
+        :param enabled: True to show the preview window, False to close it.
+        """
+        self._preview_enabled = bool(enabled)
+
+    @property
+    def print(self):
+        """
+        True while the preview window is enabled. Assigning it is the same as calling set_preview.
+        """
+        return self._preview_enabled
+
+    @print.setter
+    def print(self, enabled):
+        self.set_preview(enabled)
     
+    def preview_frame(self, image):
+        """
+        Downscales an image to half size for the preview window.
+        pyrDown does a single separable pass, which is cheaper than a linear resize and smoother than nearest.
+
+        :param image: The image to downscale.
+        :return: The downscaled image.
+        """
+        return cv2.pyrDown(image)
+
+    def _snapshot_roi(self):
+        """
+        Reads the limits and current value of the ROI nodes in one go, for the manual settings menu.
+
+        :return: Dictionary mapping OffsetX, OffsetY, Width and Height to (minimum, maximum, value).
+        """
+        return {name: self._get_limits(name) + (self._nodes[name].Value(),) for name in ("OffsetX", "OffsetY", "Width", "Height")}
+
     def manual_settings(self):
         """
         Allows the user to manually configure the camera settings through a series of prompts.
+        The preview window is shown while the prompts wait. On return only the previous preview setting is
+        restored: the window is left open, to be reused or closed by the next show_preview.
+
+        :raises EOFError: If stdin is closed before all the prompts are answered.
+        """
+        preview_enabled = self._preview_enabled
+        self.set_preview(True)
+        try:
+            return self._manual_settings()
+        finally:
+            self.set_preview(preview_enabled)
+
+    def _manual_settings(self):
         """
+        Runs the prompts of manual_settings.
+
+        :return: True once the user exits the menu.
+        """
+        roi_params = {
+            "1": ("X OFFSET", "OffsetX", self.set_offset_x),
+            "2": ("Y OFFSET", "OffsetY", self.set_offset_y),
+            "3": ("WIDTH", "Width", self.set_width),
+            "4": ("HEIGHT", "Height", self.set_height)
+        }
         while True:
-            self.print = True
             print("Choose a setting to change:")
             print("1. ROI")
             print("2. FPS")
             print("3. Gain")
             print("4. Exposure")
             print("5. Exit")
-            setting = input("Setting: ")
+            setting = self._read_command("Setting: ")
             if setting == "1":
                 while True:
-                    print("Current ROI settings: "+ "X OFFSET: " + str(self.m_node_map_remote_device.FindNode("OffsetX").Value()) + ", Y OFFSET: " + str(self.m_node_map_remote_device.FindNode("OffsetY").Value()) + ", WIDTH: " + str(self.m_node_map_remote_device.FindNode("Width").Value()) + ", HEIGHT: " + str(self.m_node_map_remote_device.FindNode("Height").Value()))
+                    roi = self._snapshot_roi()
+                    print("Current ROI settings: "+ "X OFFSET: " + str(roi["OffsetX"][2]) + ", Y OFFSET: " + str(roi["OffsetY"][2]) + ", WIDTH: " + str(roi["Width"][2]) + ", HEIGHT: " + str(roi["Height"][2]))
                     print("Choose a setting to change:")
                     print("1. Offset X")
                     print("2. Offset Y")
                     print("3. Width")
                     print("4. Height")
                     print("5. Exit")
-                    roi_setting = input("Setting: ")
-                    if roi_setting == "1":
-                        while True:
-                            print("set X OFFSET between " + str(self.m_node_map_remote_device.FindNode("OffsetX").Minimum()) + " and " + str(self.m_node_map_remote_device.FindNode("OffsetX").Maximum()) + ": ")
-                            value = input()
-                            if value:
-                                x = int(value)
-                            else:
-                                pass
-
-                            if not self.set_offset_x(x):
-                                print("Invalid Offset X")
-                                pass
-                            else:
-                                break
-                            
-                    elif roi_setting == "2":
-                        while True:
-                            print("set Y OFFSET between " + str(self.m_node_map_remote_device.FindNode("OffsetY").Minimum()) + " and " + str(self.m_node_map_remote_device.FindNode("OffsetY").Maximum()) + ": ")
-                            value = input()
-                            if value:
-                                y = int(value)
-                            else:
-                                pass
-
-                            if not self.set_offset_y(y):
-                                print("Invalid Offset Y")
-                                pass
-                            else:                                
-                                break
-                            
-                    elif roi_setting == "3":
-                        while True:
-                            print("set WIDTH between " + str(self.m_node_map_remote_device.FindNode("Width").Minimum()) + " and " + str(self.m_node_map_remote_device.FindNode("Width").Maximum()) + ": ")
-                            value = input()
-                            if value:
-                                width = int(value)
-                            else:
-                                pass
-
-                            if not self.set_width(width):
-                                print("Invalid Width")
-                                pass
-                            else:
-                                break
-                            
-                    elif roi_setting == "4":
-                        while True:
-                            print("set HEIGHT between " + str(self.m_node_map_remote_device.FindNode("Height").Minimum()) + " and " + str(self.m_node_map_remote_device.FindNode("Height").Maximum()) + ": ")
-                            value = input()
-                            if value:
-                                height = int(value)
-                            else:
-                                pass
-
-                            if not self.set_height(height):
-                                print("Invalid Height")
-                                pass
-                            else:
-                                break
-                            
+                    roi_setting = self._read_command("Setting: ")
+                    if roi_setting in roi_params:
+                        label, name, setter = roi_params[roi_setting]
+                        low, high, _ = roi[name]
+                        self._prompt_and_set("set " + label + " between " + str(low) + " and " + str(high) + ": ", setter, int, "Invalid " + label)
                     elif roi_setting == "5":
                         break
                     else:
                         print("Invalid setting")
             elif setting == "2":
-                while True:
-                    print("FPS: ")
-                    value = input()
-                    if value:
-                        fps = float(value)
-                    else:
-                        print("invalid FPS")
-                        pass
-
-                    if not self.set_fps(fps):
-                        print("Invalid FPS")
-                        pass
-                    else:
-                        break
-                    
+                self._prompt_and_set("FPS: ", self.set_fps, float, "Invalid FPS")
             elif setting == "3":
-                while True:
-                    print("set Gain between: " + str(self.m_node_map_remote_device.FindNode("Gain").Minimum()) + " and " + str(self.m_node_map_remote_device.FindNode("Gain").Maximum())+ ": ")
-                    value = input()
-                    if value:
-                        GainValue = float(value)
-                    else:
-                        print("invalid Gain")
-                        pass
-
-                    if not self.set_Gain(GainMode="Off", Gain=GainValue):
-                        print("Invalid Gain Mode")
-                        pass
-                    else:
-                        break
-                    
+                gain_min, gain_max = self._get_limits("Gain")
+                self._prompt_and_set("set Gain between: " + str(gain_min) + " and " + str(gain_max) + ": ",
+                                     lambda value: self.set_Gain(GainMode="Off", Gain=value), float, "Invalid Gain")
             elif setting == "4":
-                while True:
-                    print("set Exposure between: " + str(self.m_node_map_remote_device.FindNode("ExposureTime").Minimum()/1e3) + " ms and " + str(self.m_node_map_remote_device.FindNode("ExposureTime").Maximum()/1e3) + " ms: ")
-                    value = input()
-                    if value:
-                        ExposureValue = float(value)
-                    else:
-                        print("invalid Exposure")
-                        pass
-
-                    if not self.set_Exposure(ExposureMode="Off", ExposureTime=ExposureValue):
-                        print("Invalid Exposure Mode")
-                        pass
-                    else:
-                        break
+                exposure_min, exposure_max = self._get_limits("ExposureTime")
+                self._prompt_and_set("set Exposure between: " + str(exposure_min/1e3) + " ms and " + str(exposure_max/1e3) + " ms: ",
+                                     lambda value: self.set_Exposure(ExposureMode="Off", ExposureTime=value), float, "Invalid Exposure")
             elif setting == "5":
-                self.print = False
                 break
             else:
                 print("Invalid setting")
         print("Set values for " + str(self.ID) +" : ")
-        print("ROI:"+ "X OFFSET: " + str(self.m_node_map_remote_device.FindNode("OffsetX").Value()) + ", Y OFFSET: " + str(self.m_node_map_remote_device.FindNode("OffsetY").Value()) + ", WIDTH: " + str(self.m_node_map_remote_device.FindNode("Width").Value()) + ", HEIGHT: " + str(self.m_node_map_remote_device.FindNode("Height").Value()))
-        print("FPS: " + str(self.m_node_map_remote_device.FindNode("AcquisitionFrameRate").Value()))
-        print("Gain: " + str(self.m_node_map_remote_device.FindNode("Gain").Value()))
-        print("Exposure: " + str(self.m_node_map_remote_device.FindNode("ExposureTime").Value()/1e3))
-        self.m_node_map_remote_device.FindNode("TLParamsLocked").SetValue(1)
+        print("ROI:"+ "X OFFSET: " + str(self._nodes["OffsetX"].Value()) + ", Y OFFSET: " + str(self._nodes["OffsetY"].Value()) + ", WIDTH: " + str(self._nodes["Width"].Value()) + ", HEIGHT: " + str(self._nodes["Height"].Value()))
+        print("FPS: " + str(self._nodes["AcquisitionFrameRate"].Value()))
+        print("Gain: " + str(self._nodes["Gain"].Value()))
+        print("Exposure: " + str(self._nodes["ExposureTime"].Value()/1e3))
+        self._set_value("TLParamsLocked", 1)
 
         while True:
-            save = input("Do you want to save the settings? (y/n): ")
+            save = self._read_command("Do you want to save the settings? (y/n): ")
             if save.upper() == "Y":
                 self.save_settings()
                 break
@@ -509,6 +889,69 @@ class CameraManager:
 
         return True
 
+    def _prompt_and_set(self, prompt, setter, cast, error):
+        """
+        Asks for a value until it can be parsed and the setter accepts it.
+
+        :param prompt: Text printed before each attempt.
+        :param setter: Function applying the value, returning True on success.
+        :param cast: Type the answer is parsed with (int or float).
+        :param error: Message printed when the answer is rejected.
+        """
+        while True:
+            print(prompt)
+            try:
+                value = cast(self._read_command())
+            except ValueError:
+                print(error)
+                continue
+
+            if setter(value):
+                return
+            print(error)
+
+    def _read_command(self, prompt=""):
+        """
+        Waits for the next answer in CameraManager.commands while pumping the preview on the calling thread,
+        so the window keeps refreshing while the user types.
+
+        :param prompt: Text printed before waiting.
+        :return: The answer, without the trailing newline.
+        :raises EOFError: If stdin is closed and no answer is queued.
+        """
+        print(prompt, end="", flush=True)
+        requested = False
+        while True:
+            try:
+                if self._preview_shown:
+                    answer = CameraManager.commands.get_nowait()
+                else:
+                    # Without a window cv2.waitKey may return at once, so the queue itself paces the wait.
+                    answer = CameraManager.commands.get(timeout=0.05)
+                break
+            except queue.Empty:
+                pass
+            # A single line is requested per answer, so stdin is not read ahead of the prompts.
+            if not requested:
+                _request_stdin_line()
+                requested = True
+            self.show_preview()
+            if self._preview_shown:
+                cv2.waitKey(10)
+
+        if answer is None:
+            # Leave the marker for the next prompt, stdin stays closed.
+            CameraManager.commands.put(None)
+            raise EOFError("stdin closed while waiting for an answer")
+        return answer.rstrip("\n")
+
+    def _settings_file(self):
+        """
+        Returns the path of the JSON settings file of the camera.
+
+        :return: pathlib.Path of <folder_path>/<serial number>.json.
+        """
+        return pathlib.Path(self.folder_path) / f"{self.ID}.json"
 
     def save_settings(self):
         """
@@ -518,24 +961,37 @@ class CameraManager:
         """
         settings = {
             "ROI": {
-                "OffsetX": self.m_node_map_remote_device.FindNode("OffsetX").Value(),
-                "OffsetY": self.m_node_map_remote_device.FindNode("OffsetY").Value(),
-                "Width": self.m_node_map_remote_device.FindNode("Width").Value(),
-                "Height": self.m_node_map_remote_device.FindNode("Height").Value()
+                "OffsetX": self._nodes["OffsetX"].Value(),
+                "OffsetY": self._nodes["OffsetY"].Value(),
+                "Width": self._nodes["Width"].Value(),
+                "Height": self._nodes["Height"].Value()
             },
-            "FPS": self.m_node_map_remote_device.FindNode("AcquisitionFrameRate").Value(),
-            "Gain": self.m_node_map_remote_device.FindNode("Gain").Value(),
-            "Exposure": self.m_node_map_remote_device.FindNode("ExposureTime").Value()/1e3
+            "FPS": self._nodes["AcquisitionFrameRate"].Value(),
+            "Gain": self._nodes["Gain"].Value(),
+            "Exposure": self._nodes["ExposureTime"].Value()/1e3
         }
 
-        if not os.path.exists(self.folder_path):
-            os.makedirs(self.folder_path)
+        file_path = self._settings_file()
 
-        file_name = f"{self.ID}.json"
-        file_path = os.path.join(self.folder_path, file_name)
+        # Both serializers write the same 2-space layout, whichever one is installed.
+        if orjson is not None:
+            data = orjson.dumps(settings, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(settings, indent=2).encode()
 
-        with open(file_path, 'w') as json_file:
-            json.dump(settings, json_file, indent=4)
+        # Write next to the target and swap it in, so a crash never leaves a truncated settings file
+        tmp_path = file_path.with_suffix(".json.tmp")
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, file_path)
+        except OSError as e:
+            logger.error("Error saving settings to %s: %s", file_path, e)
+            try:
+                tmp_path.unlink(missing_ok=True)
+            except OSError:
+                pass
+            return False
 
         return True
     
@@ -553,37 +1009,67 @@ class CameraManager:
     
     def startcamera_load(self):
         """
-        Starts the camera and loads the settings from a JSON file.
+        Starts the camera and loads the settings from a JSON file. If the settings cannot be loaded,
+        the camera is stopped again instead of being left streaming with the default settings.
 
         :return: True if the camera is successfully started and configured, False otherwise.
         """
         self.Msetting = True
-        if not self.startcamera_auto():
+        # The ROI is left as the device has it, so an unchanged saved ROI is not rewritten.
+        if not self._startcamera(full_roi=False):
             return False
 
-        file_name = f"{self.ID}.json"
-        file_path = os.path.join(self.folder_path, file_name)
-        
-        if not os.path.exists(file_path):
-            print(f"Settings file {file_name} not found in {self.folder_path}")
+        if not self._load_settings():
+            self.stopcamera()
             return False
+        return True
 
-        with open(file_path, 'r') as json_file:
-            settings = json.load(json_file)
-
-        self.set_offset_x(settings["ROI"]["OffsetX"])
-        self.set_offset_y(settings["ROI"]["OffsetY"])
-        self.set_width(settings["ROI"]["Width"])
-        self.set_height(settings["ROI"]["Height"])
-        self.set_fps(settings["FPS"])
-        self.set_Gain(GainMode="Off", Gain=settings["Gain"])
-        self.set_Exposure(ExposureMode="Off", ExposureTime=settings["Exposure"])
-
-        print("Loaded settings from file: " + file_name)
-        print("ROI: X OFFSET: " + str(settings["ROI"]["OffsetX"]) + ", Y OFFSET: " + str(settings["ROI"]["OffsetY"]) + ", WIDTH: " + str(settings["ROI"]["Width"]) + ", HEIGHT: " + str(settings["ROI"]["Height"]))
-        print("FPS: " + str(settings["FPS"]))
-        print("Gain: " + str(settings["Gain"]))
-        print("Exposure: " + str(settings["Exposure"]))
+    def _load_settings(self):
+        """
+        Reads the JSON settings file of the camera and applies it.
+
+        :return: True if the settings are successfully loaded and applied, False otherwise.
+        """
+        file_path = self._settings_file()
+        file_name = file_path.name
+
+        try:
+            data = file_path.read_bytes()
+        except FileNotFoundError:
+            logger.error("Settings file %s not found in %s", file_name, self.folder_path)
+            return False
+
+        try:
+            settings = orjson.loads(data) if orjson is not None else json.loads(data)
+        except ValueError as e:
+            logger.error("Settings file %s is not valid JSON: %s", file_name, e)
+            return False
+
+        try:
+            if not self._apply_loaded(settings):
+                return False
+        except KeyError as e:
+            logger.error("Missing setting %s in %s", e, file_name)
+            return False
+        except (ValueError, TypeError) as e:
+            logger.error("Invalid settings in %s: %s", file_name, e)
+            return False
+        except Exception as e:
+            logger.error("Error applying settings from %s: %s", file_name, e)
+            return False
+
+        try:
+            self._set_value("TLParamsLocked", 1)
+        except Exception as e:
+            logger.error("Error locking transport layer parameters: %s", e)
+            return False
+
+        logger.info("Loaded settings from file: %s", file_name)
+        logger.info("ROI: X OFFSET: %s, Y OFFSET: %s, WIDTH: %s, HEIGHT: %s", settings["ROI"]["OffsetX"],
+                    settings["ROI"]["OffsetY"], settings["ROI"]["Width"], settings["ROI"]["Height"])
+        logger.info("FPS: %s", settings["FPS"])
+        logger.info("Gain: %s", settings["Gain"])
+        logger.info("Exposure: %s", settings["Exposure"])
     
         return True
 
@@ -593,16 +1079,29 @@ class CameraManager:
 
         :return: True if the camera is successfully started, False otherwise.
         """
-        if not self.print:
-            peak.Library.Initialize()
+        return self._startcamera(full_roi=True)
+
+    def _startcamera(self, full_roi):
+        """
+        Opens the camera, applies the automatic settings and starts the acquisition.
+
+        :param full_roi: If True, the ROI is reset to the full sensor. startcamera_load passes False so that
+                         the device keeps its current ROI, and a saved ROI that matches it is not rewritten.
+        :return: True if the camera is successfully started, False otherwise.
+        """
+        if not self._peak_acquired:
+            _acquire_peak()
+            self._peak_acquired = True
         
         if not self.open_camera():
+            _release_peak()
+            self._peak_acquired = False
             return False
         
         if not self.prepare_acquisition():
             sys.exit(-2)
         
-        if not self.set_roi():
+        if full_roi and not self.set_roi():
             sys.exit(-3)
         
         if not self.set_fps():
@@ -624,26 +1123,81 @@ class CameraManager:
     
     def stopcamera(self):
         """
-        Stops the camera acquisition process and closes the camera.
+        Stops the camera acquisition process and closes the camera. Calling it again once the camera
+        is stopped does nothing.
         """
         self.running = False
+        self._stop_event.set()
+        if self.acquisition_thread and self.acquisition_thread.is_alive():
+            self.acquisition_thread.join(timeout=1)
+
+        # Cleared once stopped, so a second call does not reach the device after the library is closed.
         if self.m_node_map_remote_device:
-            self.m_node_map_remote_device.FindNode("AcquisitionStop").Execute()
+            self._nodes["AcquisitionStop"].Execute()
+            self.m_node_map_remote_device = None
         if self.m_dataStream:
             self.m_dataStream.StopAcquisition(peak.AcquisitionStopMode_Default)
+            self.m_dataStream = None
+
+        # The published image points into buffers that are freed once the library is closed.
+        with self._frame_lock:
+            self.image = None
+        self._held_buffers.clear()
+        self._buffer_views.clear()
         
-        if self.acquisition_thread and self.acquisition_thread.is_alive():
-            self.acquisition_thread.join()
-        
-        peak.Library.Close()
+        if self._preview_shown:
+            cv2.destroyWindow(self.ID)
+            self._preview_shown = False
+
+        if self._peak_acquired:
+            _release_peak()
+            self._peak_acquired = False
     
-    def get_image(self):
+    def get_image(self, image_format="bgr", copy=True):
         """
         Returns the current image acquired from the camera.
 
-        :return: The current image in BGR format.
+        :param image_format: "bgr" for a 3-channel image, "gray" for the single-channel image as acquired.
+                             Without copy, the BGR image is a view repeating the gray channel, so no pixels are converted.
+        :param copy: If True, a contiguous and writable copy is returned. If False, a read-only view into the
+                     camera buffers is returned instead, which avoids the copy but is overwritten a few frames
+                     later: only use it for images that are consumed right away.
+        :return: The current image in the requested format, or None if no frame has been acquired yet.
+        :raises ValueError: If image_format is neither "bgr" nor "gray".
+        """
+        _check_image_format(image_format)
+        # Only the single-channel frame is copied under the frame lock, so the buffer it reads from cannot
+        # be requeued meanwhile; the BGR expansion runs after the lock is released.
+        with self._frame_lock:
+            image = self.image
+            if image is not None and copy:
+                image = image.copy()
+        if image is None:
+            return None
+
+        if image_format == "bgr":
+            image = np.broadcast_to(image[..., None], image.shape + (3,))
+            if copy:
+                image = image.copy()
+        return image
+    
+    def wait4frame(self, image_format="bgr", copy=True, timeout=1.0):
+        """
+        Waits for the next frame acquired from the camera. The calling thread sleeps until the
+        acquisition thread publishes a frame, without polling.
+
+        :param image_format: "bgr" or "gray", as in get_image.
+        :param copy: If False, a read-only view into the camera buffers is returned, as in get_image.
+        :param timeout: Maximum time to wait in seconds. If None, waits indefinitely.
+        :return: The new image, or None if no frame arrived within the timeout.
+        :raises ValueError: If image_format is neither "bgr" nor "gray".
         """
-        return self.bgr
+        _check_image_format(image_format)
+        with self._new_frame:
+            count = self.frame_count
+            if not self._new_frame.wait_for(lambda: self.frame_count != count, timeout):
+                return None
+        return self.get_image(image_format=image_format, copy=copy)
     
     def _SN(self):
         """
@@ -657,6 +1211,7 @@ class CameraManager:
 #EXAMPLE OF USE
 if __name__ == '__main__':
 
+    logging.basicConfig(level=logging.INFO)
     camera_managers = []
     '''ids = ["4108774181"]
     for id in ids:
@@ -675,16 +1230,18 @@ if __name__ == '__main__':
         else:
             break
 
+    serial_numbers = [cam_manager._SN() for cam_manager in camera_managers]
+    for cam_manager in camera_managers:
+        cam_manager.set_preview(True)
     try:
         while True:
+            # Every window is drawn from this thread, the acquisition threads never touch HighGUI.
             for cam_manager in camera_managers:
-                image = cam_manager.get_image()
-                if image is not None:
-                    cv2.imshow(cam_manager._SN(), cv2.resize(image,(image.shape[1]//2,image.shape[0]//2)))
+                cam_manager.show_preview()
             key = cv2.waitKey(1)
             if key == ord('q'):
-                for cam_manager in camera_managers:
-                    cv2.imwrite(cam_manager._SN() + ".png", cam_manager.get_image())
+                for sn, cam_manager in zip(serial_numbers, camera_managers):
+                    cv2.imwrite(sn + ".png", cam_manager.get_image(image_format="gray"))
                 break
     finally:
         for cam_manager in camera_managers:
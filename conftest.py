@@ -0,0 +1,22 @@
+import importlib.util
+import sys
+import types
+
+# frame_age and the other pure-Python logic under test need neither the IDS Peak SDK nor OpenCV or NumPy,
+# so the modules that are not installed are replaced by empty stubs while Ids_Camera_Manager is imported.
+_stubs = []
+for name in ("numpy", "cv2", "ids_peak"):
+    if importlib.util.find_spec(name) is None:
+        sys.modules[name] = types.ModuleType(name)
+        _stubs.append(name)
+        if name == "ids_peak":
+            for submodule in ("ids_peak", "ids_peak_ipl_extension"):
+                sys.modules["ids_peak." + submodule] = types.ModuleType("ids_peak." + submodule)
+                setattr(sys.modules[name], submodule, sys.modules["ids_peak." + submodule])
+                _stubs.append("ids_peak." + submodule)
+
+import Ids_Camera_Manager
+
+# pytest itself probes sys.modules for numpy (e.g. in pytest.approx), so the stubs are not left there.
+for name in _stubs:
+    del sys.modules[name]
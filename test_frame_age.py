@@ -0,0 +1,52 @@
+import pytest
+
+import Ids_Camera_Manager
+from Ids_Camera_Manager import CameraManager
+
+
+class FakeBuffer:
+    def __init__(self, timestamp_ns):
+        self.timestamp_ns = timestamp_ns
+
+    def Timestamp_ns(self):
+        return self.timestamp_ns
+
+
+class FakeClock:
+    def __init__(self):
+        self.now_ns = 1_000_000_000
+
+    def __call__(self):
+        return self.now_ns
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(Ids_Camera_Manager.time, "monotonic_ns", clock)
+    return clock
+
+
+def test_zero_timestamp_is_never_stale(clock):
+    cam = CameraManager()
+    for _ in range(100):
+        clock.now_ns += 10**9
+        assert cam.frame_age(FakeBuffer(0)) == 0.0
+
+
+def test_late_frame_is_detected(clock):
+    cam = CameraManager()
+    assert cam.frame_age(FakeBuffer(clock.now_ns)) == 0.0
+    clock.now_ns += 10**7
+    assert cam.frame_age(FakeBuffer(clock.now_ns - 2 * 10**8)) == pytest.approx(0.2)
+
+
+def test_clock_drift_does_not_accumulate(clock):
+    cam = CameraManager()
+    camera_ns = 0
+    # Camera clock 100 ppm slower than the host, one frame every 10 ms for 2000 s.
+    for _ in range(200_000):
+        clock.now_ns += 10**7
+        camera_ns += 10**7 - 10**3
+        age = cam.frame_age(FakeBuffer(camera_ns))
+    assert age < 0.01